@@ -1,12 +1,20 @@
 import os
 import tensorflow as tf
 import sonnet as snt
+import uuid
 
 from luminoth.datasets.exceptions import InvalidDataDirectory
 
 
 class BaseDataset(snt.AbstractModule):
-    def __init__(self, config, **kwargs):
+    def __init__(self, config, num_shards=1, shard_index=0, **kwargs):
+        """
+        Args:
+            config: Config object with all the session properties.
+            num_shards (int): Number of workers the dataset is split among.
+            shard_index (int): Index of the worker reading this dataset, so
+                that it reads only its part of the split files.
+        """
         super(BaseDataset, self).__init__(**kwargs)
         self._dataset_dir = config.dataset.dir
         self._num_epochs = config.train.num_epochs
@@ -14,6 +22,10 @@ class BaseDataset(snt.AbstractModule):
         self._split = config.dataset.split
         self._random_shuffle = config.train.random_shuffle
         self._seed = config.train.seed
+        self._cache_dir = config.dataset.get('cache_dir')
+        self._cache_size_gb = config.dataset.get('cache_size_gb')
+        self._num_shards = num_shards
+        self._shard_index = shard_index
 
         self._fixed_resize = (
             'fixed_height' in config.dataset.image_preprocessing and
@@ -27,32 +39,52 @@ class BaseDataset(snt.AbstractModule):
                 config.dataset.image_preprocessing.fixed_width
             )
 
-        self._total_queue_ops = 20
+        # Number of threads filling the example queue, and how many
+        # preprocessed examples it can hold ahead of the model.
+        self._total_queue_ops = config.dataset.get('queue_threads') or 20
+        self._queue_capacity = config.dataset.get('queue_capacity') or 100
 
     def _build(self):
-        # Find split file from which we are going to read.
-        split_path = os.path.join(
-            self._dataset_dir, '{}.tfrecords'.format(self._split)
-        )
-        if not tf.gfile.Exists(split_path):
-            raise InvalidDataDirectory(
-                '"{}" does not exist.'.format(split_path)
-            )
+        # Keep the whole input pipeline (reading, decoding, augmentation and
+        # queueing) on the host. Otherwise ops with GPU kernels get placed on
+        # the device and tensors bounce between host and device for every
+        # example. Pinning it here means each dequeued example is copied to
+        # the device exactly once, through TensorFlow's pinned staging memory.
+        with tf.device('/cpu:0'):
+            return self._build_queue()
+
+    def _build_queue(self):
         # String input producer allows for a variable number of files to read
-        # from. We just know we have a single file.
+        # from.
         filename_queue = tf.train.string_input_producer(
-            [split_path], num_epochs=self._num_epochs, seed=self._seed
+            self._get_split_files(), num_epochs=self._num_epochs,
+            seed=self._seed
         )
 
         # Define reader to parse records.
         reader = tf.TFRecordReader()
         _, raw_record = reader.read(filename_queue)
 
+        # Read serialized records ahead in a thread of its own, into a queue
+        # from which the preprocessing threads take them. Reads (which may be
+        # slow on remote filesystems) are serialized by the reader, so this
+        # keeps preprocessing threads from waiting on each other to read.
+        records_queue = tf.FIFOQueue(
+            capacity=self._queue_capacity,
+            dtypes=[tf.string],
+            shapes=[[]],
+            name='tfrecord_records_queue'
+        )
+        tf.train.add_queue_runner(tf.train.QueueRunner(
+            records_queue, [records_queue.enqueue([raw_record])]
+        ))
+        raw_record = records_queue.dequeue()
+
         values, dtypes, names = self.read_record(raw_record)
 
         if self._random_shuffle:
             queue = tf.RandomShuffleQueue(
-                capacity=100,
+                capacity=self._queue_capacity,
                 min_after_dequeue=0,
                 dtypes=dtypes,
                 names=names,
@@ -61,7 +93,7 @@ class BaseDataset(snt.AbstractModule):
             )
         else:
             queue = tf.FIFOQueue(
-                capacity=100,
+                capacity=self._queue_capacity,
                 dtypes=dtypes,
                 names=names,
                 name='tfrecord_fifo_queue'
@@ -74,3 +106,104 @@ class BaseDataset(snt.AbstractModule):
         tf.train.add_queue_runner(self.queue_runner)
 
         return queue.dequeue()
+
+    def _get_split_files(self):
+        """Find the split files from which we are going to read.
+
+        A split is either stored in a single file (`train.tfrecords`) or in
+        several ones (e.g. `train-00000-of-00008.tfrecords`). In the latter
+        case, when training on several workers, each of them reads only its
+        own subset of the files instead of the whole split.
+
+        Raises:
+            InvalidDataDirectory: When there are no files for the split.
+        """
+        split_path = os.path.join(
+            self._dataset_dir, '{}.tfrecords'.format(self._split)
+        )
+        if tf.gfile.Exists(split_path):
+            split_files = [split_path]
+        else:
+            split_files = sorted(tf.gfile.Glob(os.path.join(
+                self._dataset_dir, '{}-*.tfrecords'.format(self._split)
+            )))
+
+        if not split_files:
+            raise InvalidDataDirectory(
+                '"{}" does not exist.'.format(split_path)
+            )
+
+        if self._num_shards > 1:
+            if len(split_files) < self._num_shards:
+                tf.logging.warning(
+                    'Split "{}" has fewer files ({}) than workers ({}). Every '
+                    'worker will read the whole split.'.format(
+                        self._split, len(split_files), self._num_shards
+                    )
+                )
+            else:
+                split_files = split_files[self._shard_index::self._num_shards]
+
+        if self._cache_dir:
+            split_files = [
+                self._cache_split_file(split_file)
+                for split_file in split_files
+            ]
+
+        return split_files
+
+    def _cache_split_file(self, split_file):
+        """Copy a remote split file (e.g. in Google Cloud Storage) to disk.
+
+        Otherwise every epoch streams the whole file over the network again.
+        Files already in the cache are reused as long as they have the same
+        size as the remote ones. Files that don't fit in the cache (when
+        `cache_size_gb` is set) are read from their remote location, as are
+        local files.
+        """
+        scheme_separator = '://'
+        if scheme_separator not in split_file:
+            return split_file
+
+        # Keep the remote path, so files of different datasets don't clash.
+        cached_file = os.path.join(
+            self._cache_dir,
+            split_file.split(scheme_separator, 1)[1].lstrip('/')
+        )
+        split_file_size = tf.gfile.Stat(split_file).length
+        if (tf.gfile.Exists(cached_file) and
+                tf.gfile.Stat(cached_file).length == split_file_size):
+            return cached_file
+
+        if self._cache_size_gb:
+            cache_size = self._get_cache_size()
+            if cache_size + split_file_size > self._cache_size_gb * 1024 ** 3:
+                tf.logging.warning(
+                    'Cache is full, reading "{}" from its remote '
+                    'location.'.format(split_file)
+                )
+                return split_file
+
+        tf.logging.info('Caching "{}" into "{}".'.format(
+            split_file, cached_file
+        ))
+        tf.gfile.MakeDirs(os.path.dirname(cached_file))
+        # Copy into a temporary file first, so an interrupted copy is never
+        # mistaken for a cached one. It must be unique, as other processes
+        # (e.g. other workers or `lumi eval`) may be caching the same file.
+        tmp_file = '{}.tmp-{}'.format(cached_file, uuid.uuid4().hex)
+        tf.gfile.Copy(split_file, tmp_file, overwrite=True)
+        tf.gfile.Rename(tmp_file, cached_file, overwrite=True)
+
+        return cached_file
+
+    def _get_cache_size(self):
+        """Return the total size in bytes of the files in the cache."""
+        if not tf.gfile.IsDirectory(self._cache_dir):
+            return 0
+
+        return sum(
+            tf.gfile.Stat(os.path.join(dirname, filename)).length
+            for dirname, _, filenames in tf.gfile.Walk(self._cache_dir)
+            for filename in filenames
+        )
@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+import tensorflow as tf
+
+from easydict import EasyDict
+
+from luminoth.datasets.base_dataset import BaseDataset
+from luminoth.datasets.exceptions import InvalidDataDirectory
+
+
+class BaseDatasetTest(tf.test.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.remote_dir = os.path.join(self.tmp_dir, 'remote')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        os.makedirs(self.remote_dir)
+
+        self.base_config = EasyDict({
+            'dataset': {
+                'dir': self.remote_dir,
+                'split': 'train',
+                'cache_dir': self.cache_dir,
+                'image_preprocessing': {},
+            },
+            'train': {
+                'num_epochs': 1,
+                'batch_size': 1,
+                'random_shuffle': False,
+                'seed': None,
+            }
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_file(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _read_file(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def _write_split_files(self, filenames):
+        split_files = []
+        for filename in filenames:
+            split_file = os.path.join(self.remote_dir, filename)
+            self._write_file(split_file, 'records')
+            split_files.append(split_file)
+        return split_files
+
+    def testGetSplitFilesSingle(self):
+        """
+        Tests that a split stored in a single file is read whole.
+        """
+        split_files = self._write_split_files([
+            'train.tfrecords', 'train-00000-of-00002.tfrecords',
+            'val.tfrecords',
+        ])
+
+        dataset = BaseDataset(self.base_config)
+        self.assertEqual(dataset._get_split_files(), split_files[:1])
+
+        # Even when training on several workers.
+        dataset = BaseDataset(self.base_config, num_shards=2, shard_index=1)
+        self.assertEqual(dataset._get_split_files(), split_files[:1])
+
+    def testGetSplitFilesSharded(self):
+        """
+        Tests that a split stored in several files is read in order, each
+        worker reading only its own files.
+        """
+        split_files = self._write_split_files([
+            'train-00002-of-00004.tfrecords', 'train-00000-of-00004.tfrecords',
+            'train-00003-of-00004.tfrecords', 'train-00001-of-00004.tfrecords',
+            'val-00000-of-00001.tfrecords',
+        ])
+        split_files = sorted(split_files[:4])
+
+        dataset = BaseDataset(self.base_config)
+        self.assertEqual(dataset._get_split_files(), split_files)
+
+        dataset = BaseDataset(self.base_config, num_shards=2, shard_index=0)
+        self.assertEqual(
+            dataset._get_split_files(), [split_files[0], split_files[2]]
+        )
+
+        dataset = BaseDataset(self.base_config, num_shards=2, shard_index=1)
+        self.assertEqual(
+            dataset._get_split_files(), [split_files[1], split_files[3]]
+        )
+
+        dataset = BaseDataset(self.base_config, num_shards=3, shard_index=0)
+        self.assertEqual(
+            dataset._get_split_files(), [split_files[0], split_files[3]]
+        )
+
+    def testGetSplitFilesFewerThanWorkers(self):
+        """
+        Tests that every worker reads the whole split when there are fewer
+        files than workers.
+        """
+        split_files = self._write_split_files([
+            'train-00000-of-00002.tfrecords', 'train-00001-of-00002.tfrecords',
+        ])
+
+        dataset = BaseDataset(self.base_config, num_shards=3, shard_index=2)
+        self.assertEqual(dataset._get_split_files(), split_files)
+
+    def testGetSplitFilesMissing(self):
+        """
+        Tests that an error is raised when there are no files for the split.
+        """
+        self._write_split_files(['val.tfrecords'])
+
+        dataset = BaseDataset(self.base_config)
+        with self.assertRaises(InvalidDataDirectory):
+            dataset._get_split_files()
+
+    def testCacheLocalFile(self):
+        """
+        Tests that local files are not cached.
+        """
+        split_file = os.path.join(self.remote_dir, 'train.tfrecords')
+        self._write_file(split_file, 'records')
+
+        dataset = BaseDataset(self.base_config)
+        self.assertEqual(dataset._cache_split_file(split_file), split_file)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def testCacheRemoteFile(self):
+        """
+        Tests that remote files are copied into the cache and reused.
+        """
+        split_file = os.path.join(self.remote_dir, 'train.tfrecords')
+        self._write_file(split_file, 'records')
+        # Local files are also accessible through the `file://` scheme.
+        remote_split_file = 'file://{}'.format(split_file)
+
+        dataset = BaseDataset(self.base_config)
+        cached_file = dataset._cache_split_file(remote_split_file)
+
+        self.assertEqual(
+            cached_file,
+            os.path.join(self.cache_dir, split_file.lstrip('/'))
+        )
+        self.assertEqual(self._read_file(cached_file), 'records')
+        # No temporary files are left behind.
+        self.assertEqual(
+            os.listdir(os.path.dirname(cached_file)), ['train.tfrecords']
+        )
+
+        # A cached file with the same size is reused.
+        self._write_file(cached_file, 'cached!')
+        self.assertEqual(
+            dataset._cache_split_file(remote_split_file), cached_file
+        )
+        self.assertEqual(self._read_file(cached_file), 'cached!')
+
+        # It's copied again when the size of the remote file changes.
+        self._write_file(split_file, 'more records')
+        self.assertEqual(
+            dataset._cache_split_file(remote_split_file), cached_file
+        )
+        self.assertEqual(self._read_file(cached_file), 'more records')
+
+    def testCacheSize(self):
+        """
+        Tests that files that don't fit in the cache are read remotely.
+        """
+        split_file = os.path.join(self.remote_dir, 'train.tfrecords')
+        self._write_file(split_file, 'records')
+        remote_split_file = 'file://{}'.format(split_file)
+
+        # Room for 10 bytes only.
+        self.base_config['dataset']['cache_size_gb'] = 10. / 1024 ** 3
+        dataset = BaseDataset(self.base_config)
+
+        cached_file = dataset._cache_split_file(remote_split_file)
+        self.assertNotEqual(cached_file, remote_split_file)
+
+        other_split_file = os.path.join(self.remote_dir, 'val.tfrecords')
+        self._write_file(other_split_file, 'records')
+        remote_other_split_file = 'file://{}'.format(other_split_file)
+        self.assertEqual(
+            dataset._cache_split_file(remote_other_split_file),
+            remote_other_split_file
+        )
+
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -3,7 +3,7 @@ import tensorflow as tf
 from luminoth.datasets.base_dataset import BaseDataset
 from luminoth.utils.image import (
     resize_image_fixed, resize_image, flip_image, random_patch, random_resize,
-    random_distortion, expand
+    random_distortion, expand, pad_image_to_multiple, adjust_bboxes
 )
 
 DATA_AUGMENTATION_STRATEGIES = {
@@ -14,6 +14,10 @@ DATA_AUGMENTATION_STRATEGIES = {
     'expand': expand
 }
 
+# Methods and downscaling ratios supported when decoding JPEG images.
+JPEG_DCT_METHODS = ('INTEGER_FAST', 'INTEGER_ACCURATE')
+JPEG_DECODE_RATIOS = (1, 2, 4, 8)
+
 
 class ObjectDetectionDataset(BaseDataset):
     """Abstract object detector dataset module.
@@ -65,8 +69,37 @@ class ObjectDetectionDataset(BaseDataset):
             'min_size')
         self._image_max_size = config.dataset.image_preprocessing.get(
             'max_size')
+        self._image_pad_multiple = config.dataset.image_preprocessing.get(
+            'pad_to_multiple')
         # In case no keys are defined, default to empty list.
         self._data_augmentation = config.dataset.data_augmentation or []
+        self._queue_uint8 = config.dataset.get('queue_uint8')
+        self._jpeg_dct_method = config.dataset.get('jpeg_dct_method')
+        if (self._jpeg_dct_method and
+                self._jpeg_dct_method not in JPEG_DCT_METHODS):
+            raise ValueError(
+                'Invalid jpeg_dct_method "{}", must be one of {}'.format(
+                    self._jpeg_dct_method, JPEG_DCT_METHODS
+                )
+            )
+        self._jpeg_decode_ratio = config.dataset.get('jpeg_decode_ratio') or 1
+        if self._jpeg_decode_ratio not in JPEG_DECODE_RATIOS:
+            raise ValueError(
+                'Invalid jpeg_decode_ratio "{}", must be one of {}'.format(
+                    self._jpeg_decode_ratio, JPEG_DECODE_RATIOS
+                )
+            )
+
+    def _build(self):
+        example = super(ObjectDetectionDataset, self)._build()
+
+        # With `queue_uint8`, images go through the queue (and are copied to
+        # the device) as uint8, which takes a fourth of the memory and
+        # bandwidth of float32. They are only converted back once dequeued.
+        if self._queue_uint8:
+            example['image'] = tf.to_float(example['image'])
+
+        return example
 
     def preprocess(self, image, bboxes=None):
         """Apply transformations to image and bboxes (if available).
@@ -100,15 +133,17 @@ class ObjectDetectionDataset(BaseDataset):
         )
 
         # Decode image
-        image_raw = tf.image.decode_image(
-            context_example['image_raw'], channels=3
-        )
+        image_raw = self._decode_image(context_example['image_raw'])
 
         image = tf.cast(image_raw, tf.float32)
 
         height = tf.cast(context_example['height'], tf.int32)
         width = tf.cast(context_example['width'], tf.int32)
         image_shape = tf.stack([height, width, 3])
+        if self._jpeg_decode_ratio > 1:
+            # JPEG images are decoded to a fraction of their original size.
+            decoded_shape = tf.shape(image)
+            image_shape = tf.stack([decoded_shape[0], decoded_shape[1], 3])
         image = tf.reshape(image, image_shape)
 
         label = self._sparse_to_tensor(sequence_example['label'])
@@ -120,24 +155,79 @@ class ObjectDetectionDataset(BaseDataset):
         # Stack parsed tensors to define bounding boxes of shape (num_boxes, 5)
         bboxes = tf.stack([xmin, ymin, xmax, ymax, label], axis=1)
 
+        if self._jpeg_decode_ratio > 1:
+            bboxes = adjust_bboxes(
+                bboxes,
+                old_height=tf.to_float(height), old_width=tf.to_float(width),
+                new_height=tf.to_float(image_shape[0]),
+                new_width=tf.to_float(image_shape[1])
+            )
+
         image, bboxes, preprocessing_details = self.preprocess(image, bboxes)
+        scale_factor = preprocessing_details['scale_factor']
+
+        if self._jpeg_decode_ratio > 1:
+            # Make the scale factor relative to the stored image instead of
+            # the decoded one (both sides are scaled alike, up to rounding).
+            scale_factor = tf.convert_to_tensor(scale_factor) * (
+                tf.to_float(image_shape[0]) / tf.to_float(height)
+            )
+
+        # Padding is only done here and not in `preprocess`, as predictions
+        # (which also use `preprocess`) would be clipped to the padded size.
+        if self._image_pad_multiple:
+            image = pad_image_to_multiple(
+                image, self._image_pad_multiple
+            )['image']
 
         filename = tf.cast(context_example['filename'], tf.string)
 
+        image_dtype = tf.float32
+        if self._queue_uint8:
+            # Resizing and augmentation leave non-integer pixel values, round
+            # them back to the [0, 255] range so the image can be queued as
+            # uint8. Note this undoes augmentations that change pixel values
+            # by less than 0.5 (e.g. a small `distortion.brightness`).
+            image = tf.saturate_cast(tf.round(image), tf.uint8)
+            image_dtype = tf.uint8
+
         # TODO: Send additional metadata through the queue (scale_factor,
         # applied_augmentations)
 
-        queue_dtypes = [tf.float32, tf.int32, tf.string, tf.float32]
+        queue_dtypes = [image_dtype, tf.int32, tf.string, tf.float32]
         queue_names = ['image', 'bboxes', 'filename', 'scale_factor']
         queue_values = {
             'image': image,
             'bboxes': bboxes,
             'filename': filename,
-            'scale_factor': preprocessing_details['scale_factor'],
+            'scale_factor': scale_factor,
         }
 
         return queue_values, queue_dtypes, queue_names
 
+    def _decode_image(self, image_raw):
+        """Decodes an encoded image into a uint8 Tensor of shape (H, W, 3).
+
+        Decoding is usually the most expensive step of the input pipeline. If
+        `jpeg_dct_method` is set, JPEG images are decoded with that method
+        (e.g. "INTEGER_FAST", which is faster than libjpeg's default at the
+        cost of a tiny loss of precision). If `jpeg_decode_ratio` is set, JPEG
+        images are downscaled by that factor while being decoded, which skips
+        most of the decoding work for images much larger than the size they
+        will be resized to. Other formats are decoded as usual.
+        """
+        if not self._jpeg_dct_method and self._jpeg_decode_ratio == 1:
+            return tf.image.decode_image(image_raw, channels=3)
+
+        return tf.cond(
+            tf.image.is_jpeg(image_raw),
+            lambda: tf.image.decode_jpeg(
+                image_raw, channels=3, ratio=self._jpeg_decode_ratio,
+                dct_method=self._jpeg_dct_method or ''
+            ),
+            lambda: tf.image.decode_image(image_raw, channels=3),
+        )
+
     def _augment(self, image, bboxes=None, default_prob=0.5):
         """Applies different data augmentation techniques.
 
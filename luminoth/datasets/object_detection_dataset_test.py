@@ -4,6 +4,7 @@ import numpy as np
 from easydict import EasyDict
 
 from luminoth.datasets.object_detection_dataset import ObjectDetectionDataset
+from luminoth.utils.dataset import to_int64, to_bytes, to_string
 
 
 class ObjectDetectionDatasetTest(tf.test.TestCase):
@@ -45,6 +46,74 @@ class ObjectDetectionDatasetTest(tf.test.TestCase):
                 })
             return image_aug, bboxes_aug, applied_data_augmentation
 
+    def _get_record(self, image_raw, bboxes):
+        """
+        Returns a serialized example with the given encoded image and bboxes,
+        as written by `ObjectDetectionWriter`.
+        """
+        feature_lists = tf.train.FeatureLists(feature_list={
+            key: tf.train.FeatureList(
+                feature=[to_int64(bbox[idx]) for bbox in bboxes]
+            )
+            for idx, key in enumerate(
+                ['xmin', 'ymin', 'xmax', 'ymax', 'label']
+            )
+        })
+        context = tf.train.Features(feature={
+            'image_raw': to_bytes(image_raw),
+            'filename': to_string('image'),
+            'width': to_int64(64),
+            'height': to_int64(48),
+            'depth': to_int64(3),
+        })
+        return tf.train.SequenceExample(
+            feature_lists=feature_lists, context=context
+        ).SerializeToString()
+
+    def _run_read_record(self, encode_fn, bboxes):
+        image = np.random.randint(
+            low=0, high=255, size=(48, 64, 3)
+        ).astype(np.uint8)
+        with self.test_session() as sess:
+            image_raw = sess.run(encode_fn(image))
+
+        # No resizing, so that only the decoding changes the image size.
+        self.base_config['dataset']['image_preprocessing'] = {}
+        self.base_config['dataset']['jpeg_decode_ratio'] = 2
+        model = ObjectDetectionDataset(self.base_config)
+        values, _, _ = model.read_record(
+            tf.constant(self._get_record(image_raw, bboxes))
+        )
+
+        with self.test_session() as sess:
+            return sess.run(values)
+
+    def testReadRecordJpegDecodeRatio(self):
+        """
+        Tests that JPEG images are downscaled while decoding, along with their
+        bboxes
+        """
+        bboxes = [[10, 6, 40, 30, 1], [0, 0, 63, 42, 2]]
+        values = self._run_read_record(tf.image.encode_jpeg, bboxes)
+
+        self.assertEqual(values['image'].shape, (24, 32, 3))
+        self.assertAllEqual(
+            values['bboxes'], [[5, 3, 20, 15, 1], [0, 0, 31, 21, 2]]
+        )
+        # Relative to the stored image.
+        self.assertAllClose(values['scale_factor'], 0.5)
+
+    def testReadRecordJpegDecodeRatioNotJpeg(self):
+        """
+        Tests that the JPEG decode ratio doesn't change other images
+        """
+        bboxes = [[10, 6, 40, 30, 1], [0, 0, 63, 42, 2]]
+        values = self._run_read_record(tf.image.encode_png, bboxes)
+
+        self.assertEqual(values['image'].shape, (48, 64, 3))
+        self.assertAllEqual(values['bboxes'], bboxes)
+        self.assertAllClose(values['scale_factor'], 1.)
+
     def testSortedAugmentation(self):
         """
         Tests that the augmentation is applied in order
@@ -87,6 +156,28 @@ class ObjectDetectionDatasetTest(tf.test.TestCase):
         self.assertAllEqual(image, image_aug)
         self.assertAllEqual(bboxes, bboxes_aug)
 
+    def testInvalidJpegDctMethod(self):
+        """
+        Tests that JPEG DCT methods not supported by TensorFlow are rejected
+        """
+        self.base_config['dataset']['jpeg_dct_method'] = 'INTEGER_FAST'
+        ObjectDetectionDataset(self.base_config)
+
+        self.base_config['dataset']['jpeg_dct_method'] = 'INTEGER_FAST '
+        with self.assertRaises(ValueError):
+            ObjectDetectionDataset(self.base_config)
+
+    def testInvalidJpegDecodeRatio(self):
+        """
+        Tests that JPEG decode ratios not supported by TensorFlow are rejected
+        """
+        self.base_config['dataset']['jpeg_decode_ratio'] = 2
+        ObjectDetectionDataset(self.base_config)
+
+        self.base_config['dataset']['jpeg_decode_ratio'] = 3
+        with self.assertRaises(ValueError):
+            ObjectDetectionDataset(self.base_config)
+
 
 if __name__ == '__main__':
     tf.test.main()
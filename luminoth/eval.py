@@ -10,6 +10,7 @@ from luminoth.models import get_model
 from luminoth.utils.bbox_overlap import bbox_overlap
 from luminoth.utils.config import get_config
 from luminoth.utils.image_vis import image_vis_summaries
+from luminoth.utils.training import get_session_config
 
 
 @click.command(help='Evaluate trained (or training) models')
@@ -17,11 +18,12 @@ from luminoth.utils.image_vis import image_vis_summaries
 @click.option('config_files', '--config', '-c', required=True, multiple=True, help='Config to use.')  # noqa
 @click.option('--watch/--no-watch', default=True, help='Keep watching checkpoint directory for new files.')  # noqa
 @click.option('--from-global-step', type=int, default=None, help='Consider only checkpoints after this global step')  # noqa
+@click.option('--every-n-steps', type=int, default=None, help='Skip checkpoints less than this many global steps after the last one evaluated. The latest one is still evaluated if no newer checkpoint appears for twice `train.save_checkpoint_secs`.')  # noqa
 @click.option('override_params', '--override', '-o', multiple=True, help='Override model config params.')  # noqa
 @click.option('--files-per-class', type=int, default=10, help='How many files per class display in every epoch.')  # noqa
 @click.option('--max-detections', type=int, default=100, help='Max detections to consider.')  # noqa
-def eval(dataset_split, config_files, watch, from_global_step, override_params,
-         files_per_class, max_detections):
+def eval(dataset_split, config_files, watch, from_global_step, every_n_steps,
+         override_params, files_per_class, max_detections):
     """Evaluate models using dataset."""
 
     # If the config file is empty, our config will be the base_config for the
@@ -165,6 +167,13 @@ def eval(dataset_split, config_files, watch, from_global_step, override_params,
     files_to_visualize = {}
 
     last_global_step = from_global_step
+    last_evaluated_step = None
+    # Latest checkpoint skipped by `every_n_steps`. It's evaluated anyway if
+    # no newer checkpoint appears for a while, as training has probably
+    # finished, so that the final model is always evaluated.
+    pending_checkpoint = None
+    pending_since = None
+    pending_timeout = 2 * (config.train.get('save_checkpoint_secs') or 600)
     while True:
         # Get the checkpoint files to evaluate.
         try:
@@ -181,6 +190,26 @@ def eval(dataset_split, config_files, watch, from_global_step, override_params,
             time.sleep(5)
             continue
 
+        # Evaluating takes a while, so avoid spending it on checkpoints too
+        # close to the last one evaluated.
+        checkpoints, pending = select_checkpoints(
+            checkpoints, last_evaluated_step, every_n_steps
+        )
+        if pending is not None:
+            tf.logging.info(
+                'Will evaluate global_step {} if no newer checkpoint appears '
+                'in {}s'.format(pending['global_step'], pending_timeout)
+            )
+            pending_checkpoint = pending
+            pending_since = time.time()
+        elif checkpoints:
+            # There's a newer checkpoint to evaluate.
+            pending_checkpoint = None
+        elif (pending_checkpoint is not None and
+                time.time() - pending_since > pending_timeout):
+            checkpoints = [pending_checkpoint]
+            pending_checkpoint = None
+
         for checkpoint in checkpoints:
             # Always returned in order, so it's safe to assign directly.
             tf.logging.info(
@@ -199,6 +228,7 @@ def eval(dataset_split, config_files, watch, from_global_step, override_params,
                     files_to_visualize=files_to_visualize,
                 )
                 last_global_step = checkpoint['global_step']
+                last_evaluated_step = checkpoint['global_step']
                 tf.logging.info('Evaluated in {:.2f}s'.format(
                     time.time() - start
                 ))
@@ -214,6 +244,10 @@ def eval(dataset_split, config_files, watch, from_global_step, override_params,
                 time.sleep(5)
                 continue
 
+        if pending is not None:
+            # Don't get the skipped checkpoint again in the next round.
+            last_global_step = pending['global_step']
+
         # If no watching was requested, finish the execution.
         if not watch:
             return
@@ -279,6 +313,49 @@ def get_checkpoints(run_dir, from_global_step=None, last_only=False):
     return checkpoints
 
 
+def select_checkpoints(checkpoints, last_evaluated_step=None,
+                       every_n_steps=None):
+    """Select which checkpoints to evaluate.
+
+    Checkpoints less than ``every_n_steps`` global steps after the previous
+    one selected are skipped.
+
+    Args:
+        checkpoints (list): Checkpoints as returned by ``get_checkpoints``.
+        last_evaluated_step (int): Global step of the last checkpoint
+            evaluated, if any.
+        every_n_steps (int): Minimum number of global steps between evaluated
+            checkpoints. If ``None``, all checkpoints are selected.
+
+    Returns:
+        List of the selected checkpoints, in the same order, and the latest
+        checkpoint if it was skipped (or ``None``).
+    """
+    if not every_n_steps:
+        return checkpoints, None
+
+    selected = []
+    pending = None
+    for checkpoint in checkpoints:
+        if (last_evaluated_step is not None and
+                checkpoint['global_step'] - last_evaluated_step <
+                every_n_steps):
+            tf.logging.info(
+                'Skipping global_step {}, less than {} steps after the last '
+                'evaluated one'.format(
+                    checkpoint['global_step'], every_n_steps
+                )
+            )
+            pending = checkpoint
+            continue
+
+        selected.append(checkpoint)
+        last_evaluated_step = checkpoint['global_step']
+        pending = None
+
+    return selected, pending
+
+
 def evaluate_once(config, writer, saver, ops, checkpoint,
                   class_labels, metrics_scope='metrics', image_vis=None,
                   files_per_class=None, files_to_visualize=None):
@@ -309,7 +386,7 @@ def evaluate_once(config, writer, saver, ops, checkpoint,
         'gt_classes': [],  # Ground-truth classes for each bounding box.
     }
 
-    with tf.Session() as sess:
+    with tf.Session(config=get_session_config(config.train)) as sess:
         sess.run(ops['init_op'])
         saver.restore(sess, checkpoint['file'])
 
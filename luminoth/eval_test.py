@@ -0,0 +1,68 @@
+import tensorflow as tf
+
+from luminoth.eval import select_checkpoints
+
+
+class EvalTest(tf.test.TestCase):
+    def _get_checkpoints(self, global_steps):
+        return [
+            {'global_step': step, 'file': 'model.ckpt-{}'.format(step)}
+            for step in global_steps
+        ]
+
+    def _get_global_steps(self, checkpoints):
+        return [c['global_step'] for c in checkpoints]
+
+    def testSelectAllCheckpoints(self):
+        """
+        Tests that all checkpoints are selected without `every_n_steps`.
+        """
+        checkpoints = self._get_checkpoints([10, 20, 30])
+        selected, pending = select_checkpoints(
+            checkpoints, last_evaluated_step=5
+        )
+        self.assertEqual(selected, checkpoints)
+        self.assertIsNone(pending)
+
+    def testSelectEveryNSteps(self):
+        """
+        Tests that checkpoints close to the previous one are skipped.
+        """
+        checkpoints = self._get_checkpoints([10, 20, 30, 40, 50, 60])
+        selected, pending = select_checkpoints(checkpoints, every_n_steps=25)
+        self.assertEqual(self._get_global_steps(selected), [10, 40])
+        # The latest checkpoint is skipped too, but returned as pending.
+        self.assertEqual(pending['global_step'], 60)
+
+        # The first checkpoint is compared to the last one evaluated.
+        selected, pending = select_checkpoints(
+            checkpoints, last_evaluated_step=0, every_n_steps=25
+        )
+        self.assertEqual(self._get_global_steps(selected), [30, 60])
+        self.assertIsNone(pending)
+
+    def testSelectOneCheckpointAtATime(self):
+        """
+        Tests that checkpoints are skipped when found one at a time (e.g.
+        when only the last checkpoint is kept).
+        """
+        evaluated = []
+        last_evaluated_step = None
+        for global_step in [10, 20, 30, 40, 50, 60]:
+            selected, pending = select_checkpoints(
+                self._get_checkpoints([global_step]),
+                last_evaluated_step=last_evaluated_step, every_n_steps=25
+            )
+            evaluated.extend(self._get_global_steps(selected))
+            if selected:
+                last_evaluated_step = selected[-1]['global_step']
+
+        self.assertEqual(evaluated, [10, 40])
+        self.assertEqual(pending['global_step'], 60)
+
+        selected, pending = select_checkpoints([], 40, every_n_steps=25)
+        self.assertEqual(selected, [])
+        self.assertIsNone(pending)
+
+if __name__ == '__main__':
+    tf.test.main()
@@ -41,17 +41,23 @@ class COCOReader(ObjectDetectionReader):
 
         self._total_classes = sorted(set(category_to_name.values()))
 
+        # There are hundreds of thousands of annotations, so look up the
+        # label of each category once instead of once per annotation.
+        category_to_label = {}
+        for category_id, name in category_to_name.items():
+            # If the class is not in `classes`, it was filtered.
+            if name in self.classes:
+                category_to_label[category_id] = self.classes.index(name)
+
         self._image_to_bboxes = {}
         for annotation in annotations_json['annotations']:
             image_id = annotation['image_id']
             x, y, width, height = annotation['bbox']
 
-            # If the class is not in `classes`, it was filtered.
-            try:
-                annotation_class = self.classes.index(
-                    category_to_name[annotation['category_id']]
-                )
-            except ValueError:
+            annotation_class = category_to_label.get(
+                annotation['category_id']
+            )
+            if annotation_class is None:
                 continue
 
             self._image_to_bboxes.setdefault(image_id, []).append({
@@ -16,10 +16,12 @@ from .writers import ObjectDetectionWriter
 @click.option('--only-images', help='Create dataset with specific examples. Useful to test model if your model has the ability to overfit.')  # noqa
 @click.option('--limit-examples', type=int, help='Limit the dataset to the first `N` examples.')  # noqa
 @click.option('--class-examples', type=int, help='Finish when every class has at least `N` number of samples. This will be the attempted lower bound; more examples might be added or a class might finish with fewer samples depending on the dataset.')  # noqa
+@click.option('--num-shards', type=int, default=1, help='Number of files to split each split into, so workers of distributed training can read different files.')  # noqa
 @click.option('overrides', '--override', '-o', multiple=True, help='Custom parameters for readers.')  # noqa
 @click.option('--debug', is_flag=True, help='Set level logging to DEBUG.')
 def transform(dataset_reader, data_dir, output_dir, splits, only_classes,
-              only_images, limit_examples, class_examples, overrides, debug):
+              only_images, limit_examples, class_examples, num_shards,
+              overrides, debug):
     """
     Prepares dataset for ingestion.
 
@@ -59,7 +61,9 @@ def transform(dataset_reader, data_dir, output_dir, splits, only_classes,
 
             # We assume we are saving object detection objects, but it should
             # be easy to modify once we have different types of objects.
-            writer = ObjectDetectionWriter(split_reader, output_dir, split)
+            writer = ObjectDetectionWriter(
+                split_reader, output_dir, split, num_shards=num_shards
+            )
             writer.save()
 
             tf.logging.info('Composition per class ({}):'.format(split))
@@ -26,13 +26,16 @@ class ObjectDetectionWriter(BaseWriter):
     Reads dataset from a subclass of ObjectDetectionReader and saves it using
     the default format for tfrecords.
     """
-    def __init__(self, reader, output_dir, split='data'):
+    def __init__(self, reader, output_dir, split='data', num_shards=1):
         """
         Args:
             reader:
             output_dir: Directory to save the resulting tfrecords.
             split: Split being save, which is used as a filename for the
                 resulting file.
+            num_shards: Number of files to split the records into (e.g.
+                `train-00000-of-00004.tfrecords`), so that each worker can
+                read its own files when training on several of them.
         """
         super(ObjectDetectionWriter, self).__init__()
         if not isinstance(reader, ObjectDetectionReader):
@@ -43,6 +46,7 @@ class ObjectDetectionWriter(BaseWriter):
         self._reader = reader
         self._output_dir = output_dir
         self._split = split
+        self._num_shards = num_shards
 
     def save(self):
         """
@@ -59,29 +63,56 @@ class ObjectDetectionWriter(BaseWriter):
             for label in self._reader.classes
         ], tf.gfile.GFile(classes_file, 'w'))
 
-        record_file = os.path.join(
-            self._output_dir, '{}.tfrecords'.format(self._split))
-        writer = tf.python_io.TFRecordWriter(record_file)
+        if self._num_shards > 1:
+            record_files = [
+                os.path.join(
+                    self._output_dir, '{}-{:05d}-of-{:05d}.tfrecords'.format(
+                        self._split, shard, self._num_shards
+                    )
+                )
+                for shard in range(self._num_shards)
+            ]
+            single_record_file = os.path.join(
+                self._output_dir, '{}.tfrecords'.format(self._split))
+            if tf.gfile.Exists(single_record_file):
+                tf.logging.warning(
+                    '"{}" exists and will be read instead of the sharded '
+                    'files.'.format(single_record_file)
+                )
+        else:
+            record_files = [os.path.join(
+                self._output_dir, '{}.tfrecords'.format(self._split))]
+        writers = [
+            tf.python_io.TFRecordWriter(record_file)
+            for record_file in record_files
+        ]
 
         tf.logging.debug('Found {} images.'.format(self._reader.total))
 
         with click.progressbar(self._reader.iterate(),
                                length=self._reader.total) as record_list:
+            total_written = 0
             for record_idx, record in enumerate(record_list):
                 tf_record = self._record_to_tf(record)
                 if tf_record is not None:
-                    writer.write(tf_record.SerializeToString())
+                    # Distribute records evenly among the shards.
+                    writers[total_written % len(writers)].write(
+                        tf_record.SerializeToString()
+                    )
+                    total_written += 1
 
             if self._output_dir.startswith('gs://'):
                 tf.logging.info('Saving tfrecord to Google Cloud Storage. '
                                 'It may take a while.')
-            writer.close()
+            for writer in writers:
+                writer.close()
 
         if self._reader.yielded_records == 0:
             tf.logging.error(
                 'Data is missing. Removing record file. '
                 '(Use "--debug" flag to display all logs)')
-            tf.gfile.Remove(record_file)
+            for record_file in record_files:
+                tf.gfile.Remove(record_file)
             return
         elif self._reader.errors > 0:
             tf.logging.warning(
@@ -92,7 +123,7 @@ class ObjectDetectionWriter(BaseWriter):
             )
 
         tf.logging.info('Saved {} records to "{}"'.format(
-            self._reader.yielded_records, record_file))
+            self._reader.yielded_records, '", "'.join(record_files)))
 
     def _validate_record(self, record):
         """
@@ -11,8 +11,14 @@ from luminoth.datasets import get_dataset
 from luminoth.datasets.exceptions import InvalidDataDirectory
 from luminoth.models import get_model
 from luminoth.utils.config import get_config
-from luminoth.utils.hooks import ImageVisHook, VarVisHook
-from luminoth.utils.training import get_optimizer, clip_gradients_by_norm
+from luminoth.utils.hooks import (
+    ImageVisHook, VarVisHook, PrefetchToDeviceHook
+)
+from luminoth.utils.training import (
+    get_optimizer, clip_gradients_by_norm, prefetch_to_device,
+    accumulate_gradients, enable_mixed_precision, get_session_config,
+    get_gate_gradients
+)
 from luminoth.utils.experiments import save_run
 
 
@@ -37,21 +43,48 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
 
     model = model_class(config)
 
+    # Balance variables among `ps` servers by their size instead of placing
+    # them in a round-robin fashion. Otherwise a few servers may end up with
+    # most of the parameters (e.g. the large fully-connected layers), and
+    # with most of the traffic of pushing gradients and pulling updates.
+    has_ps = cluster_spec is not None and 'ps' in cluster_spec.jobs
+    ps_strategy = None
+    if has_ps:
+        ps_strategy = tf.contrib.training.GreedyLoadBalancingStrategy(
+            cluster_spec.num_tasks('ps'),
+            tf.contrib.training.byte_size_load_fn
+        )
+
     # Placement of ops on devices using replica device setter
     # which automatically places the parameters on the `ps` server
     # and the `ops` on the workers
     #
     # See:
     # https://www.tensorflow.org/api_docs/python/tf/train/replica_device_setter
-    with tf.device(tf.train.replica_device_setter(cluster=cluster_spec)):
+    with tf.device(tf.train.replica_device_setter(
+            cluster=cluster_spec, ps_strategy=ps_strategy)):
         try:
             config['dataset']['type']
         except KeyError:
             raise KeyError('dataset.type should be set on the custom config.')
 
+        # When training on several workers, each one reads its own part of
+        # the dataset.
+        dataset_kwargs = {}
+        if cluster_spec is not None:
+            workers = [
+                (job, index)
+                for job in ('master', 'worker') if job in cluster_spec.jobs
+                for index in cluster_spec.task_indices(job)
+            ]
+            dataset_kwargs = {
+                'num_shards': len(workers),
+                'shard_index': workers.index((job_name, task_index)),
+            }
+
         try:
             dataset_class = get_dataset_fn(config.dataset.type)
-            dataset = dataset_class(config)
+            dataset = dataset_class(config, **dataset_kwargs)
             train_dataset = dataset()
         except InvalidDataDirectory as exc:
             tf.logging.error(
@@ -59,6 +92,14 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
             )
             sys.exit(1)
 
+        # Optionally copy the next batch into the device while the current
+        # one is being processed.
+        stage_op = None
+        if config.train.get('prefetch_to_device'):
+            train_dataset, stage_op = prefetch_to_device(
+                train_dataset, config.train.prefetch_to_device
+            )
+
         train_image = train_dataset['image']
         train_filename = train_dataset['filename']
         train_bboxes = train_dataset['bboxes']
@@ -70,6 +111,12 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
 
         optimizer = get_optimizer(config.train, global_step)
 
+        # The loss scale optimizer used for mixed precision wraps the actual
+        # one, so keep a reference to the latter to look up its slots.
+        slots_optimizer = optimizer
+        if config.train.get('mixed_precision'):
+            optimizer = enable_mixed_precision(optimizer)
+
         # TODO: Is this necesarry? Couldn't we just get them from the
         # trainable vars collection? We should probably improve our
         # usage of collections.
@@ -78,25 +125,44 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
         # Compute, clip and apply gradients
         with tf.name_scope('gradients'):
             grads_and_vars = optimizer.compute_gradients(
-                total_loss, trainable_vars
+                total_loss, trainable_vars,
+                gate_gradients=get_gate_gradients(config.train)
             )
 
             if config.train.clip_by_norm:
-                grads_and_vars = clip_gradients_by_norm(grads_and_vars)
+                # With mixed precision, the dynamic loss scale makes the
+                # gradients overflow on purpose in some steps, which are then
+                # skipped, so they must not be checked for invalid values.
+                grads_and_vars = clip_gradients_by_norm(
+                    grads_and_vars,
+                    check_numerics=not config.train.get('mixed_precision')
+                )
+
+        # When accumulating gradients, only one out of every
+        # `accumulation_steps` steps updates the variables (and increments the
+        # global step), using the average of the accumulated gradients.
+        accumulation_steps = config.train.get('accumulation_steps') or 1
+        accumulate_op = None
 
         update_ops = tf.get_collection(tf.GraphKeys.UPDATE_OPS)
         with tf.control_dependencies(update_ops):
-            train_op = optimizer.apply_gradients(
-                grads_and_vars, global_step=global_step
-            )
+            if accumulation_steps > 1:
+                accumulate_op, train_op = accumulate_gradients(
+                    optimizer, grads_and_vars, accumulation_steps,
+                    global_step=global_step
+                )
+            else:
+                train_op = optimizer.apply_gradients(
+                    grads_and_vars, global_step=global_step
+                )
 
         # Create custom init for slots in optimizer, as we don't save them to
         # our checkpoints. An example of slots in an optimizer are the Momentum
         # variables in MomentumOptimizer. We do this because slot variables can
         # effectively duplicate the size of your checkpoint!
         slot_variables = [
-            optimizer.get_slot(var, name)
-            for name in optimizer.get_slot_names()
+            slots_optimizer.get_slot(var, name)
+            for name in slots_optimizer.get_slot_names()
             for var in trainable_vars
         ]
         slot_init = tf.variables_initializer(
@@ -104,11 +170,18 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
             name='optimizer_slots_initializer'
         )
 
-        # Create saver for saving/restoring model
+        # Create saver for saving/restoring model.
+        #
+        # When using `ps` servers, save the checkpoint sharded by device: each
+        # server writes its own variables in parallel, instead of the chief
+        # pulling every variable and writing them all while the training loop
+        # waits. This requires `job_dir` to be reachable from all the servers
+        # (e.g. Google Cloud Storage).
         model_saver = tf.train.Saver(
             set(tf.global_variables()) - set(slot_variables),
             name='model_saver',
             max_to_keep=config.train.get('checkpoints_max_keep', 1),
+            sharded=has_ps,
         )
 
         # Create saver for loading pretrained checkpoint into base network
@@ -167,6 +240,10 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
         )
         hooks.extend([debug_hook])
 
+    if stage_op is not None:
+        # Every worker needs to keep its own staging area filled.
+        hooks.append(PrefetchToDeviceHook(stage_op))
+
     if not config.train.job_dir:
         tf.logging.warning(
             '`job_dir` is not defined. Checkpoints and logs will not be saved.'
@@ -226,30 +303,52 @@ def run(config, target='', cluster_spec=None, is_chief=True, job_name=None,
         save_checkpoint_secs=config.train.save_checkpoint_secs,
         save_summaries_steps=config.train.save_summaries_steps,
         save_summaries_secs=config.train.save_summaries_secs,
+        config=get_session_config(config.train),
     ) as sess:
 
         coord = tf.train.Coordinator()
         threads = tf.train.start_queue_runners(sess=sess, coord=coord)
 
         try:
+            micro_step = 0
+            run_saved = False
             while not coord.should_stop():
                 before = time.time()
+
+                micro_step += 1
+                step_op = train_op
+                if accumulate_op is not None and (
+                        micro_step % accumulation_steps):
+                    step_op = accumulate_op
+
                 _, train_loss, step, filename = sess.run([
-                    train_op, total_loss, global_step, train_filename
+                    step_op, total_loss, global_step, train_filename
                 ], options=run_options)
 
                 # TODO: Add image summary every once in a while.
 
+                step_log = 'step: {}'.format(step)
+                if accumulate_op is not None:
+                    # The global step only advances once every
+                    # `accumulation_steps` steps, so tell them apart.
+                    step_log += ', micro_step: {}/{}'.format(
+                        (micro_step - 1) % accumulation_steps + 1,
+                        accumulation_steps
+                    )
+
                 tf.logging.info(
-                    '{}step: {}, file: {}, train_loss: {}, in {:.2f}s'.format(
-                        log_prefix, step, filename, train_loss,
+                    '{}{}, file: {}, train_loss: {}, in {:.2f}s'.format(
+                        log_prefix, step_log, filename, train_loss,
                         time.time() - before
                     ))
 
-                if is_chief and step == 1:
+                if (is_chief and not run_saved and step_op is train_op and
+                        step <= 1):
                     # We save the run after first batch to make sure everything
-                    # works properly.
+                    # works properly. When accumulating gradients, that's the
+                    # first step that actually updates the variables.
                     save_run(config, environment=environment)
+                    run_saved = True
 
         except tf.errors.OutOfRangeError:
             tf.logging.info(
@@ -121,6 +121,40 @@ class TrainTest(tf.test.TestCase):
             get_model_fn=self.get_model
         )
 
+    def testTrainPrefetch(self):
+        model_type = 'mockfasterrcnn'
+
+        override_params = [
+            'train.num_epochs={}'.format(self.total_epochs),
+            'train.job_dir=',
+            'train.prefetch_to_device=/cpu:0',
+        ]
+
+        config = self.get_config(model_type, override_params=override_params)
+
+        # This should not fail
+        run(
+            config, get_dataset_fn=self.get_dataset,
+            get_model_fn=self.get_model
+        )
+
+    def testTrainAccumulate(self):
+        model_type = 'mockfasterrcnn'
+
+        override_params = [
+            'train.num_epochs={}'.format(self.total_epochs),
+            'train.job_dir=',
+            'train.accumulation_steps=2',
+        ]
+
+        config = self.get_config(model_type, override_params=override_params)
+
+        # This should not fail
+        run(
+            config, get_dataset_fn=self.get_dataset,
+            get_model_fn=self.get_model
+        )
+
     def testTrainSave(self):
         model_type = 'mockfasterrcnn'
 
@@ -1,2 +1,3 @@
 from .image_vis_hook import ImageVisHook  # noqa
 from .var_vis_hook import VarVisHook  # noqa
+from .prefetch_hook import PrefetchToDeviceHook  # noqa
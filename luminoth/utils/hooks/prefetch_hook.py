@@ -0,0 +1,20 @@
+import tensorflow as tf
+
+
+class PrefetchToDeviceHook(tf.train.SessionRunHook):
+    """Runs the staging op returned by `prefetch_to_device` on every step.
+
+    The staging area is filled once right after the session is created, so
+    the first step already has a batch to consume. From then on, every run
+    stages the next batch while the current one is being processed.
+    """
+
+    def __init__(self, stage_op):
+        super(PrefetchToDeviceHook, self).__init__()
+        self._stage_op = stage_op
+
+    def after_create_session(self, session, coord):
+        session.run(self._stage_op)
+
+    def before_run(self, run_context):
+        return tf.train.SessionRunArgs(self._stage_op)
@@ -147,6 +147,41 @@ def resize_image_fixed(image, new_height, new_width, bboxes=None):
     }
 
 
+def pad_image_to_multiple(image, multiple):
+    """Pads the image with zeros so its sides are a multiple of `multiple`.
+
+    Padding is added to the bottom and right sides of the image, so bounding
+    boxes don't need to be adjusted.
+
+    Rounding up image sizes keeps the number of different input shapes the
+    model sees small, so memory blocks of the allocator (and the algorithms
+    autotuned for each shape) are reused between steps instead of being
+    created for every new size.
+
+    Args:
+        image: Tensor with image of shape (H, W, 3).
+        multiple: Integer both sides of the padded image will be a multiple
+            of.
+
+    Returns:
+        image: Tensor with padded image of shape (H', W', 3).
+    """
+    image_shape = tf.shape(image)
+    height = image_shape[0]
+    width = image_shape[1]
+
+    padded_height = (height + multiple - 1) // multiple * multiple
+    padded_width = (width + multiple - 1) // multiple * multiple
+
+    image = tf.image.pad_to_bounding_box(
+        image, 0, 0, padded_height, padded_width
+    )
+
+    return {
+        'image': image,
+    }
+
+
 def patch_image(image, bboxes=None, offset_height=0, offset_width=0,
                 target_height=None, target_width=None):
     """Gets a patch using tf.image.crop_to_bounding_box and adjusts bboxes
@@ -5,7 +5,7 @@ from easydict import EasyDict
 
 from luminoth.utils.image import (
     resize_image, flip_image, random_patch, random_resize, random_distortion,
-    patch_image
+    patch_image, pad_image_to_multiple
 )
 from luminoth.utils.test.gt_boxes import generate_gt_boxes
 
@@ -275,6 +275,27 @@ class ImageTest(tf.test.TestCase):
         self.assertAllClose(ret_image, image)
         self.assertAllClose(ret_bboxes, bboxes)
 
+    def testPadImageToMultiple(self):
+        image = self._gen_image(100, 130, 3)
+        with self.test_session() as sess:
+            padded_image = sess.run(
+                pad_image_to_multiple(image, 32)['image']
+            )
+
+        # Padding is added to the bottom and right sides only.
+        self.assertEqual(padded_image.shape, (128, 160, 3))
+        self.assertAllClose(padded_image[:100, :130], image)
+        self.assertAllEqual(padded_image[100:], 0)
+        self.assertAllEqual(padded_image[:, 130:], 0)
+
+        # Images with sides already a multiple of the value are unchanged.
+        image = self._gen_image(64, 96, 3)
+        with self.test_session() as sess:
+            padded_image = sess.run(
+                pad_image_to_multiple(image, 32)['image']
+            )
+        self.assertAllClose(padded_image, image)
+
     def testFlipOnlyImage(self):
         # No changes to image or boxes when no flip is specified.
         image = self._gen_image(100, 100, 3)
@@ -10,6 +10,12 @@ OPTIMIZERS = {
     'rmsprop': tf.train.RMSPropOptimizer,
 }
 
+GATE_GRADIENTS = {
+    'none': tf.train.Optimizer.GATE_NONE,
+    'op': tf.train.Optimizer.GATE_OP,
+    'graph': tf.train.Optimizer.GATE_GRAPH,
+}
+
 LEARNING_RATE_DECAY_METHODS = {
     'polynomial_decay': tf.train.polynomial_decay,
     'piecewise_constant': tf.train.piecewise_constant,
@@ -81,7 +87,79 @@ def get_optimizer(train_config, global_step=None):
     return optimizer_cls(learning_rate, **optimizer_config)
 
 
-def clip_gradients_by_norm(grads_and_vars, add_to_summary=False):
+def get_gate_gradients(train_config):
+    """
+    Get the gating of gradient computation from train config.
+
+    With "op" (the default), all the gradients of each op are computed before
+    any of them is used. With "none", the update of each variable starts as
+    soon as its gradient is ready, overlapping the per-variable optimizer
+    updates with the rest of the backward pass at the cost of slightly less
+    reproducible results.
+
+    Raises:
+        ValueError: When the gating value is not valid.
+    """
+    gate_gradients = train_config.get('gate_gradients') or 'op'
+    if gate_gradients not in GATE_GRADIENTS:
+        raise ValueError(
+            'Invalid gate_gradients "{}"'.format(gate_gradients)
+        )
+
+    return GATE_GRADIENTS[gate_gradients]
+
+
+def enable_mixed_precision(optimizer):
+    """Enable automatic mixed precision training for `optimizer`.
+
+    Eligible ops of the graph are rewritten to run in float16 (using Tensor
+    Cores where available), while variables are kept in float32. The returned
+    optimizer scales the loss dynamically to avoid gradient underflow, and
+    skips the update of steps in which gradients overflow.
+
+    Raises:
+        ValueError: When the installed TensorFlow version doesn't support
+            automatic mixed precision.
+    """
+    try:
+        graph_rewrite = (
+            tf.train.experimental.enable_mixed_precision_graph_rewrite
+        )
+    except AttributeError:
+        raise ValueError(
+            'Mixed precision training requires TensorFlow 1.14 or newer.'
+        )
+
+    return graph_rewrite(optimizer)
+
+
+def get_session_config(train_config):
+    """
+    Get the `tf.ConfigProto` for the session from train config.
+
+    GPU memory is reserved all at once by default, optionally capped by
+    `gpu_memory_fraction`, or as needed with `gpu_allow_growth`. With
+    `xla_jit`, clusters of ops are compiled by XLA into fused kernels.
+    """
+    gpu_options = tf.GPUOptions(
+        allow_growth=bool(train_config.get('gpu_allow_growth')),
+    )
+    if train_config.get('gpu_memory_fraction'):
+        gpu_options.per_process_gpu_memory_fraction = (
+            train_config.gpu_memory_fraction
+        )
+    session_config = tf.ConfigProto(gpu_options=gpu_options)
+
+    if train_config.get('xla_jit'):
+        session_config.graph_options.optimizer_options.global_jit_level = (
+            tf.OptimizerOptions.ON_1
+        )
+
+    return session_config
+
+
+def clip_gradients_by_norm(grads_and_vars, add_to_summary=False,
+                           check_numerics=True):
     if add_to_summary:
         for grad, var in grads_and_vars:
             if grad is not None:
@@ -93,13 +171,15 @@ def clip_gradients_by_norm(grads_and_vars, add_to_summary=False):
                 )
 
     # Clip by norm. Grad can be null when not training some modules.
+    # Invalid gradients are expected (and skipped) when using mixed precision,
+    # so `check_numerics` allows not failing on them.
     with tf.name_scope('clip_gradients_by_norm'):
         grads_and_vars = [
             (
                 tf.check_numerics(
                     tf.clip_by_norm(gv[0], 10.),
                     'Invalid gradient'
-                ), gv[1]
+                ) if check_numerics else tf.clip_by_norm(gv[0], 10.), gv[1]
             )
             if gv[0] is not None else gv
             for gv in grads_and_vars
@@ -118,3 +198,107 @@ def clip_gradients_by_norm(grads_and_vars, add_to_summary=False):
                 )
 
     return grads_and_vars
+
+
+def accumulate_gradients(optimizer, grads_and_vars, accumulation_steps,
+                         global_step=None):
+    """Apply gradients averaged over `accumulation_steps` steps.
+
+    Gradients are added to local (non-saved) accumulators in every step, and
+    only the last step of each group updates the variables. In distributed
+    training the accumulators live in the worker, so gradients are only sent
+    to the parameter servers once every `accumulation_steps` steps.
+
+    Args:
+        optimizer: Optimizer used to apply the accumulated gradients.
+        grads_and_vars: List of (gradient, variable) pairs, as returned by
+            `optimizer.compute_gradients`.
+        accumulation_steps (int): Number of steps to accumulate gradients
+            for before applying them.
+        global_step: Variable to increment every time gradients are applied.
+
+    Returns:
+        accumulate_op: Op that adds the gradients of the current step to the
+            accumulators, without updating the variables.
+        apply_op: Op that adds the gradients of the current step, applies the
+            averaged accumulated gradients and resets the accumulators.
+    """
+    grads_and_vars = [gv for gv in grads_and_vars if gv[0] is not None]
+
+    with tf.name_scope('accumulate_gradients'):
+        accumulators = []
+        for grad, var in grads_and_vars:
+            # Accumulators must not depend on any op of the training step
+            # when being initialized, and must be placed next to the
+            # gradients instead of the parameter servers.
+            with tf.control_dependencies(None), tf.device(grad.device):
+                accumulators.append(tf.Variable(
+                    tf.zeros(var.get_shape(), dtype=var.dtype.base_dtype),
+                    trainable=False,
+                    collections=[tf.GraphKeys.LOCAL_VARIABLES],
+                    name='accumulator',
+                ))
+
+        accumulated = [
+            accumulator.assign_add(tf.convert_to_tensor(grad))
+            for accumulator, (grad, _) in zip(accumulators, grads_and_vars)
+        ]
+        accumulate_op = tf.group(*accumulated)
+
+        apply_op = optimizer.apply_gradients([
+            (accumulated_grad / accumulation_steps, var)
+            for accumulated_grad, (_, var) in zip(accumulated, grads_and_vars)
+        ], global_step=global_step)
+
+        with tf.control_dependencies([apply_op]):
+            apply_op = tf.group(*[
+                accumulator.assign(tf.zeros_like(accumulator))
+                for accumulator in accumulators
+            ])
+
+    return accumulate_op, apply_op
+
+
+def prefetch_to_device(tensors, device):
+    """Stage input tensors on `device` one step ahead of the model.
+
+    The host to device copy of the next batch is issued in the same
+    `Session.run` that computes the current one, so it overlaps with the
+    computation instead of preceding it. String tensors can't be placed on a
+    GPU, so they are staged on the host, in lockstep with the rest.
+
+    Args:
+        tensors (dict): Tensors as returned by the dataset.
+        device (str): Device in which to stage the tensors (e.g. '/gpu:0').
+
+    Returns:
+        staged_tensors (dict): Tensors with the same keys as `tensors`, read
+            from the staging areas.
+        stage_op: Op that stages the next set of tensors. It must be run once
+            before the first step, and then along with every step (see
+            `PrefetchToDeviceHook`).
+    """
+    names = sorted(tensors.keys())
+    areas_names = [
+        (device, [n for n in names if tensors[n].dtype != tf.string]),
+        ('/cpu:0', [n for n in names if tensors[n].dtype == tf.string]),
+    ]
+
+    staged_tensors = {}
+    stage_ops = []
+    with tf.name_scope('prefetch_to_device'):
+        for area_device, area_names in areas_names:
+            if not area_names:
+                continue
+
+            with tf.device(area_device):
+                area = tf.contrib.staging.StagingArea(
+                    dtypes=[tensors[n].dtype for n in area_names],
+                    names=area_names,
+                )
+                stage_ops.append(
+                    area.put({n: tensors[n] for n in area_names})
+                )
+                staged_tensors.update(area.get())
+
+    return staged_tensors, tf.group(*stage_ops)
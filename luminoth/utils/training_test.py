@@ -0,0 +1,63 @@
+import numpy as np
+import tensorflow as tf
+
+from luminoth.utils.training import accumulate_gradients
+
+
+class TrainingTest(tf.test.TestCase):
+    def setUp(self):
+        tf.reset_default_graph()
+
+    def testAccumulateGradients(self):
+        """
+        Tests that accumulated gradients are applied averaged, once.
+        """
+        learning_rate = 0.1
+        accumulation_steps = 3
+        grads = np.array([
+            [1., -2.],
+            [3., 4.],
+            [-1., 7.],
+        ], dtype=np.float32)
+
+        var = tf.Variable([1., 2.])
+        grad = tf.placeholder(tf.float32, shape=(2,))
+        global_step = tf.train.get_or_create_global_step()
+        optimizer = tf.train.GradientDescentOptimizer(learning_rate)
+
+        accumulate_op, apply_op = accumulate_gradients(
+            optimizer, [(grad, var)], accumulation_steps,
+            global_step=global_step
+        )
+        accumulators = tf.local_variables()
+
+        with self.test_session() as sess:
+            sess.run([
+                tf.global_variables_initializer(),
+                tf.local_variables_initializer(),
+            ])
+
+            for step_grad in grads[:-1]:
+                sess.run(accumulate_op, feed_dict={grad: step_grad})
+
+            # Variables are not updated while accumulating.
+            var_value, step = sess.run([var, global_step])
+            self.assertAllClose(var_value, [1., 2.])
+            self.assertEqual(step, 0)
+
+            sess.run(apply_op, feed_dict={grad: grads[-1]})
+
+            var_value, step, accumulators_value = sess.run(
+                [var, global_step, accumulators]
+            )
+            self.assertAllClose(
+                var_value,
+                np.array([1., 2.]) - learning_rate * np.mean(grads, axis=0)
+            )
+            self.assertEqual(step, 1)
+            self.assertEqual(len(accumulators_value), 1)
+            self.assertAllClose(accumulators_value[0], [0., 0.])
+
+
+if __name__ == '__main__':
+    tf.test.main()